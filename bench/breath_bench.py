@@ -0,0 +1,118 @@
+"""Breathing engine cost with many concurrent sessions (in-process, no network).
+
+    python bench/breath_bench.py --sessions 100,300,1000 [--rate 300] [--phase 4]
+
+Starts N sessions spread evenly over --stagger seconds (one phase by default, like
+users arriving at random; 0 starts them all at once, the worst case) against
+messages whose edit_text just records the call (with --latency of simulated round
+trip) and stops every tenth one half-way with
+engine.stop() followed by a "stopped" edit, the way /stop does. Reports CPU time
+per session-second, edits sent vs. phase changes (the rest were coalesced), how
+late phase edits landed after their phase began (p50/p99/max), sessions that
+reached the final message, the smallest gap between two edits of one chat (kept
+>= 1 s), phase edits that landed after the stop text (must be 0) and peak traced
+memory. Phases default to the bot's own 4 s.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bot  # noqa: E402
+
+STOPPED = "stopped"
+
+
+class FakeMessage:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.started = 0.0
+        self.edits = []
+
+    async def edit_text(self, text: str):
+        await asyncio.sleep(self.latency)
+        self.edits.append((time.monotonic(), text))
+
+
+def percentile(values: list, q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def stop_later(engine: "bot.BreathingEngine", chat_id: int, msg: FakeMessage, after: float):
+    await asyncio.sleep(after)
+    await engine.stop(chat_id)
+    await msg.edit_text(STOPPED)
+
+
+async def run(n: int, rate: float, phase: float, cycles: int, latency: float, stagger: float) -> dict:
+    bot.BOX_BREATHING = tuple((key, phase) for key, _ in bot.BOX_BREATHING)
+    bot.BREATH_CYCLES = cycles
+    steps = len(bot.BOX_BREATHING) * cycles
+    step_of = {bot.breath_text("en", step): step for step in range(steps + 1)}
+    engine = bot.BreathingEngine(rate)
+    messages = [FakeMessage(latency) for _ in range(n)]
+    stopped = set(range(0, n, 10))
+    tracemalloc.start()
+    cpu0, t0 = time.process_time(), time.monotonic()
+    stoppers = []
+    for chat_id, msg in enumerate(messages):
+        await asyncio.sleep(stagger / n)
+        msg.started = time.monotonic()
+        engine.start(chat_id, msg, "en")
+        if chat_id in stopped:
+            stoppers.append(asyncio.create_task(stop_later(engine, chat_id, msg, steps * phase / 2 + 0.1)))
+    while engine.sessions:
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*stoppers)
+    wall, cpu = time.monotonic() - t0, time.process_time() - cpu0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await engine.close()
+
+    late, after_stop = [], 0
+    for msg in messages:
+        texts = [text for _, text in msg.edits]
+        if STOPPED in texts:
+            after_stop += len(texts) - 1 - texts.index(STOPPED)
+        for when, text in msg.edits:
+            if text in step_of:
+                late.append(when - msg.started - step_of[text] * phase)
+    edits = sum(len(m.edits) for m in messages) - len(stopped)
+    # the stop text is the user's own request, not one of the engine's paced edits
+    min_gap = min((b[0] - a[0] for m in messages for a, b in zip(m.edits, m.edits[1:]) if b[1] != STOPPED),
+                  default=float("inf"))
+    finished = sum(1 for m in messages if m.edits and m.edits[-1][1] == bot.load_i18n("en")["breath_done"])
+    return {"sessions": n, "wall": wall, "cpu_ms_per_session_s": cpu * 1000 / (n * steps * phase),
+            "edits": edits, "phase_changes": n * steps - len(stopped) * steps // 2, "finished": finished,
+            "late_p50": percentile(late, 0.5), "late_p99": percentile(late, 0.99), "late_max": max(late, default=0),
+            "min_gap": min_gap, "after_stop": after_stop, "peak_kib": peak / 1024}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", default="100,300,1000")
+    ap.add_argument("--rate", type=float, default=bot.BREATH_EDIT_RATE, help="edits/s across sessions")
+    ap.add_argument("--phase", type=float, default=bot.BOX_BREATHING[0][1], help="seconds per phase")
+    ap.add_argument("--cycles", type=int, default=2)
+    ap.add_argument("--stagger", type=float, default=None, help="seconds over which sessions start (default: one phase)")
+    ap.add_argument("--latency", type=float, default=0.05, help="simulated editMessageText round trip")
+    args = ap.parse_args()
+    print(f"{'sessions':>8}{'wall s':>8}{'cpu ms/sess·s':>15}{'edits':>8}{'phases':>8}{'done':>6}"
+          f"{'late p50/p99/max s':>20}{'min gap s':>11}{'after stop':>12}{'peak KiB':>10}")
+    failed = False
+    for n in map(int, args.sessions.split(",")):
+        stagger = args.phase if args.stagger is None else args.stagger
+        r = asyncio.run(run(n, args.rate, args.phase, args.cycles, args.latency, stagger))
+        late = f"{r['late_p50']:.2f}/{r['late_p99']:.2f}/{r['late_max']:.2f}"
+        print(f"{r['sessions']:>8}{r['wall']:>8.1f}{r['cpu_ms_per_session_s']:>15.3f}{r['edits']:>8}"
+              f"{r['phase_changes']:>8}{r['finished']:>6}{late:>20}{r['min_gap']:>11.2f}{r['after_stop']:>12}"
+              f"{r['peak_kib']:>10.0f}")
+        failed |= r["after_stop"] > 0 or r["min_gap"] < 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Crisis matcher: labelled-corpus check and per-message latency vs. phrase count.
+
+    python bench/crisis_bench.py [--extra 100,500,2000] [--rounds 2000]
+
+Exits non-zero if any corpus line is misclassified. Latency is reported for the
+shipped phrase lists and with N synthetic phrases added, to show the cost
+per message stays flat as the lists grow.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import crisis  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "crisis_corpus.tsv")
+
+
+def load_corpus():
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                label, text = line.rstrip("\n").split("\t", 1)
+                yield int(label), text
+
+
+def check(matcher):
+    failures = []
+    for label, text in load_corpus():
+        hit = matcher.search(text)
+        if bool(hit) != bool(label):
+            failures.append((label, text, hit))
+    return failures
+
+
+def synthetic(n, rng):
+    alphabet = string.ascii_lowercase + "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя"
+    return [" ".join("".join(rng.choice(alphabet) for _ in range(rng.randint(4, 9)))
+                     for _ in range(rng.randint(1, 4))) for _ in range(n)]
+
+
+def timing(matcher, texts, rounds):
+    samples = []
+    for _ in range(rounds):
+        for text in texts:
+            t0 = time.perf_counter_ns()
+            matcher.search(text)
+            samples.append(time.perf_counter_ns() - t0)
+    samples.sort()
+    return statistics.median(samples) / 1000, samples[int(len(samples) * 0.99)] / 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--extra", default="100,500,2000")
+    ap.add_argument("--rounds", type=int, default=200)
+    args = ap.parse_args()
+
+    base = crisis.load_phrases()
+    matcher = crisis.CrisisMatcher(base)
+    failures = check(matcher)
+    total = sum(1 for _ in load_corpus())
+    print(f"corpus: {total - len(failures)}/{total} correct")
+    for label, text, hit in failures:
+        print(f"  MISS label={label} hit={hit!r} text={text!r}")
+
+    texts = [text for _, text in load_corpus()]
+    long_text = " ".join(texts)
+    rng = random.Random(0)
+    print(f"{'phrases':>8} {'p50 us/msg':>11} {'p99 us/msg':>11} {'p50 us/long':>12}")
+    for extra in [0] + [int(x) for x in args.extra.split(",") if x]:
+        m = crisis.CrisisMatcher(base + synthetic(extra, rng))
+        p50, p99 = timing(m, texts, args.rounds)
+        lp50, _ = timing(m, [long_text], max(1, args.rounds // 10))
+        print(f"{len(m.phrases):>8} {p50:>11.1f} {p99:>11.1f} {lp50:>12.1f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
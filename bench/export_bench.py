@@ -0,0 +1,155 @@
+"""/export cost for long histories (in-process, no network).
+
+    python bench/export_bench.py --years 1,5,20 --per-day 3 [--pdf]
+
+Seeds a fresh database with one user who checked in and logged triggers --per-day
+times a day for each number of years, builds the export and reports rows, wall
+time, output size, peak traced memory (should stay flat as the history grows) and
+the longest event-loop stall seen by a 5 ms ticker running alongside. It then runs
+the whole send_export through a real telegram.Bot whose request backend drains the
+uploads in 64 KiB chunks the way httpx streams them, and reports that peak too.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bot  # noqa: E402
+from telegram import Bot  # noqa: E402
+from telegram.request import BaseRequest  # noqa: E402
+
+TRIGGERS = ["loud noise", "crowded metro", "deadline at work", "air raid alert", "news", "family call"]
+
+
+def seed(db_path: str, uid: int, years: int, per_day: int, rng: random.Random) -> int:
+    now = int(time.time())
+    start = now - years * 365 * 86400
+    checkins, notes, plans = [], [], []
+    for day in range(years * 365):
+        for i in range(per_day):
+            ts = start + day * 86400 + i * 3600
+            checkins.append((uid, ts, rng.randint(0, 10), ", ".join(rng.sample(TRIGGERS, 2)),
+                             round(rng.uniform(4, 9), 1), "short walk"))
+            notes.append((uid, ts + 60, rng.choice(TRIGGERS)))
+        if day % 3 == 0:
+            plans.append((uid, start + day * 86400, "drink water"))
+    with sqlite3.connect(db_path) as db:
+        db.execute("INSERT INTO users (user_id, lang, country, created_at) VALUES (?,?,?,?)", (uid, "uk", "UA", start))
+        db.executemany("INSERT INTO checkins (user_id, ts, stress, triggers, sleep_hours, micro_goal) "
+                       "VALUES (?,?,?,?,?,?)", checkins)
+        db.executemany("INSERT INTO triggers (user_id, ts, note) VALUES (?,?,?)", notes)
+        db.executemany("INSERT INTO plans (user_id, ts, item) VALUES (?,?,?)", plans)
+        db.execute("INSERT INTO daily_rollups (user_id, day, checkins, stress_sum, stress_n, sleep_sum, sleep_n) "
+                   "SELECT user_id, ts / 86400, COUNT(*), SUM(stress), COUNT(stress), SUM(sleep_hours), "
+                   "COUNT(sleep_hours) FROM checkins WHERE user_id=? GROUP BY ts / 86400", (uid,))
+        db.execute("INSERT INTO trigger_terms (user_id, day, term, n) "
+                   "SELECT user_id, ts / 86400, note, COUNT(*) FROM triggers WHERE user_id=? "
+                   "GROUP BY ts / 86400, note", (uid,))
+    return len(checkins) + len(notes) + len(plans)
+
+
+class DrainRequest(BaseRequest):
+    """Answers every Bot API call locally; file parts are read in chunks and dropped."""
+
+    def __init__(self):
+        self.uploaded = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        if url.endswith("/getMe"):
+            result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        else:
+            for _, content, _ in (request_data.multipart_data or {}).values() if request_data else ():
+                if isinstance(content, bytes):
+                    self.uploaded += len(content)
+                    continue
+                while chunk := content.read(65536):
+                    self.uploaded += len(chunk)
+            result = {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+async def ticker(stop: asyncio.Event, lag: list):
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lag.append(time.perf_counter() - t - 0.005)
+
+
+async def run(args) -> int:
+    tmp = tempfile.mkdtemp(prefix="svitlo-export-")
+    bot.storage = bot.open_storage(os.path.join(tmp, "bench.sqlite3"), bot.SCHEMA)
+    await bot.init_db()
+    rng = random.Random(args.seed)
+    t = bot.load_i18n("uk")
+    if args.pdf:
+        # font registration and reportlab's imports are one-off costs, kept out of the first row
+        bot._pdf_font()
+        import reportlab.graphics.charts.lineplots, reportlab.graphics.renderPDF, reportlab.pdfgen.canvas  # noqa: F401
+    request = DrainRequest()
+    tg = Bot("1:bench", request=request, get_updates_request=request)
+    await tg.initialize()
+    print(f"{'years':>5}{'rows':>9}{'wall s':>8}{'csv KiB':>9}{'pdf KiB':>9}{'peak KiB':>10}{'max stall ms':>14}"
+          f"{'send peak KiB':>15}{'sent KiB':>10}")
+    try:
+        for uid, years in enumerate(args.years, 1):
+            rows = seed(bot.storage.path, uid, years, args.per_day, rng)
+            stop, lag = asyncio.Event(), []
+            tick = asyncio.create_task(ticker(stop, lag))
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            csv_file, pdf_file = await bot.build_export(uid, "Europe/Kyiv", t, args.pdf)
+            wall = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            stop.set()
+            await tick
+            sizes = []
+            for f in (csv_file, pdf_file):
+                if f is None:
+                    sizes.append(0)
+                    continue
+                with f:
+                    f.seek(0, os.SEEK_END)
+                    sizes.append(f.tell())
+            request.uploaded = 0
+            tracemalloc.start()
+            await bot.send_export(tg, uid, {"user_id": uid, "lang": "uk", "country": "UA"}, args.pdf)
+            send_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{years:>5}{rows:>9}{wall:>8.2f}{sizes[0] / 1024:>9.0f}{sizes[1] / 1024:>9.0f}"
+                  f"{peak / 1024:>10.0f}{max(lag, default=0) * 1000:>14.1f}"
+                  f"{send_peak / 1024:>15.0f}{request.uploaded / 1024:>10.0f}")
+    finally:
+        await tg.shutdown()
+        await bot.close_db()
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=lambda s: [int(x) for x in s.split(",")], default=[1, 5, 20])
+    ap.add_argument("--per-day", type=int, default=3, help="check-ins and trigger notes per day")
+    ap.add_argument("--pdf", action="store_true", help="also render the PDF (needs reportlab)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    if args.pdf and bot.reportlab is None:
+        sys.exit("--pdf needs reportlab installed")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
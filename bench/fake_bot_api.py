@@ -0,0 +1,257 @@
+"""A small local stand-in for the Telegram Bot API.
+
+Serves the methods the bot uses (getMe, setWebhook, sendMessage, editMessageText, sendDocument, ...)
+and delivers synthetic updates either by POSTing them to the bot's webhook or through
+getUpdates for polling mode. Every outgoing bot message is recorded per chat.
+
+Run it, then start the bot against it:
+
+    python bench/fake_bot_api.py --port 8081 --users 20
+    TELEGRAM_API_URL=http://127.0.0.1:8081 RUN_MODE=webhook WORKERS=2 \\
+        WEBHOOK_URL=http://127.0.0.1:8443/telegram python bot.py
+
+With --users it waits for the bot to register its webhook, sends /start from
+each user and prints the replies.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict, deque
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+
+BOT_USER = {"id": 1000, "is_bot": True, "first_name": "Svitlo AI", "username": "svitlo_fake_bot",
+            "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, description: str, **parameters):
+        super().__init__(description)
+        self.code, self.description, self.parameters = code, description, parameters
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": f"U{user_id}", "language_code": "en"}
+
+
+class FakeBotAPI:
+    """`rate_limit` (messages/s over a 1 s window) answers excess sendMessage calls with
+    429 and retry_after, like Telegram's flood control; chats in `blocked` get 403."""
+
+    def __init__(self, rate_limit: Optional[float] = None):
+        self.webhook_url: Optional[str] = None
+        self.secret_token: Optional[str] = None
+        self.webhook_set = asyncio.Event()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.replies: Dict[int, "asyncio.Queue[Dict[str, Any]]"] = defaultdict(asyncio.Queue)
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_cond = asyncio.Condition()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conns: set = set()  # handler tasks, cancelled on close()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.rate_limit = rate_limit
+        self.blocked: set = set()
+        self.throttled = 0
+        self._recent_sends: deque = deque()
+
+    # --- server ---
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self._client = httpx.AsyncClient(timeout=30,
+                                         limits=httpx.Limits(max_connections=200, max_keepalive_connections=200))
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._conns):
+                task.cancel()
+            await asyncio.gather(*self._conns, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._conns.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _, path, _ = line.decode().split(" ", 2)
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, v = h.decode().split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    result = await self._call(path.rsplit("/", 1)[-1], self._params(headers, body))
+                    status, payload = 200, {"ok": True, "result": result}
+                except ApiError as e:
+                    status, payload = e.code, {"ok": False, "error_code": e.code, "description": e.description}
+                    if e.parameters:
+                        payload["parameters"] = e.parameters
+                payload = json.dumps(payload).encode()
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                             % (status, HTTPStatus(status).phrase.encode(), len(payload), payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # a cancelled handler must end quietly: asyncio.streams logs its exception otherwise
+            pass
+        finally:
+            self._conns.discard(asyncio.current_task())
+            writer.close()
+
+    @staticmethod
+    def _params(headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+        if not body:
+            return {}
+        ctype = headers.get("content-type", "")
+        if ctype.startswith("application/json"):
+            return json.loads(body)
+        if ctype.startswith("multipart/form-data"):
+            # file uploads: files come back as {"filename", "data"}, other fields as below
+            form = BytesParser(policy=policy.HTTP).parsebytes(b"Content-Type: %s\r\n\r\n%s" % (ctype.encode(), body))
+            fields = [(part.get_param("name", header="content-disposition"), part.get_filename(),
+                       part.get_payload(decode=True)) for part in form.iter_parts()]
+            files = {k: {"filename": fn, "data": data} for k, fn, data in fields if fn is not None}
+            pairs = [(k, data.decode()) for k, fn, data in fields if fn is None]
+        else:
+            files, pairs = {}, parse_qsl(body.decode())
+        # PTB sends form fields whose values are JSON-encoded
+        out = dict(files)
+        for k, v in pairs:
+            try:
+                out[k] = json.loads(v)
+            except ValueError:
+                out[k] = v
+        return out
+
+    async def _call(self, method: str, p: Dict[str, Any]) -> Any:
+        self.calls[method] += 1
+        if method == "getMe":
+            return BOT_USER
+        if method == "setWebhook":
+            self.webhook_url, self.secret_token = p.get("url"), p.get("secret_token")
+            self.webhook_set.set()
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method == "getUpdates":
+            return await self._get_updates(int(p.get("offset", 0) or 0), float(p.get("timeout", 0) or 0))
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(p["chat_id"])
+            if chat_id in self.blocked:
+                raise ApiError(403, "Forbidden: bot was blocked by the user")
+            self._throttle()
+            msg = {"message_id": int(p.get("message_id") or next(self._message_ids)), "date": int(time.time()),
+                   "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER, "text": p.get("text", "")}
+            if method == "editMessageText":
+                msg["edit_date"] = int(time.time())
+            self.replies[chat_id].put_nowait({"method": method, "text": msg["text"], "at": time.perf_counter()})
+            return msg
+        if method == "sendDocument":
+            chat_id = int(p["chat_id"])
+            if chat_id in self.blocked:
+                raise ApiError(403, "Forbidden: bot was blocked by the user")
+            self._throttle()
+            doc = p["document"]
+            msg = {"message_id": next(self._message_ids), "date": int(time.time()),
+                   "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER, "caption": p.get("caption", ""),
+                   "document": {"file_id": f"doc{next(self._message_ids)}", "file_unique_id": "u",
+                                "file_name": doc["filename"], "file_size": len(doc["data"])}}
+            self.replies[chat_id].put_nowait({"method": method, "text": msg["caption"], "filename": doc["filename"],
+                                              "data": doc["data"], "at": time.perf_counter()})
+            return msg
+        return True
+
+    def _throttle(self):
+        if self.rate_limit is None:
+            return
+        now = time.monotonic()
+        while self._recent_sends and self._recent_sends[0] <= now - 1:
+            self._recent_sends.popleft()
+        if len(self._recent_sends) >= self.rate_limit:
+            self.throttled += 1
+            raise ApiError(429, "Too Many Requests: retry after 1", retry_after=1)
+        self._recent_sends.append(now)
+
+    async def _get_updates(self, offset: int, timeout: float) -> List[Dict[str, Any]]:
+        async with self._pending_cond:
+            self._pending = [u for u in self._pending if u["update_id"] >= offset]
+            if not self._pending and timeout:
+                try:
+                    await asyncio.wait_for(self._pending_cond.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return list(self._pending)
+
+    # --- updates ---
+    def text_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        msg = {"message_id": next(self._message_ids), "date": int(time.time()),
+               "chat": {"id": user_id, "type": "private"}, "from": _user(user_id), "text": text}
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": msg}
+
+    def callback_update(self, user_id: int, data: str) -> Dict[str, Any]:
+        return {"update_id": next(self._update_ids), "callback_query": {
+            "id": str(next(self._message_ids)), "from": _user(user_id), "chat_instance": str(user_id), "data": data,
+            "message": {"message_id": next(self._message_ids), "date": int(time.time()),
+                        "chat": {"id": user_id, "type": "private"}, "from": BOT_USER, "text": "..."}}}
+
+    async def deliver(self, update: Dict[str, Any]):
+        """POST to the webhook if one is registered, else queue for getUpdates."""
+        if self.webhook_url:
+            headers = {"X-Telegram-Bot-Api-Secret-Token": self.secret_token} if self.secret_token else {}
+            r = await self._client.post(self.webhook_url, json=update, headers=headers)
+            r.raise_for_status()
+            return
+        async with self._pending_cond:
+            self._pending.append(update)
+            self._pending_cond.notify_all()
+
+    async def send_text(self, user_id: int, text: str):
+        await self.deliver(self.text_update(user_id, text))
+
+    async def next_reply(self, chat_id: int, timeout: float = 30) -> Dict[str, Any]:
+        return await asyncio.wait_for(self.replies[chat_id].get(), timeout)
+
+
+async def _demo(port: int, users: int):
+    api = FakeBotAPI()
+    port = await api.start(port=port)
+    print(f"fake Bot API on http://127.0.0.1:{port} (TELEGRAM_API_URL)", flush=True)
+    try:
+        if users:
+            await api.webhook_set.wait()
+            print(f"webhook registered: {api.webhook_url}", flush=True)
+            await asyncio.gather(*(api.send_text(uid, "/start") for uid in range(1, users + 1)))
+            for uid in range(1, users + 1):
+                reply = await api.next_reply(uid)
+                print(uid, reply["text"].splitlines()[0], flush=True)
+        # keep serving until interrupted so the bot can shut down cleanly
+        await asyncio.Event().wait()
+    finally:
+        await api.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--users", type=int, default=0)
+    args = ap.parse_args()
+    try:
+        asyncio.run(_demo(args.port, args.users))
+    except KeyboardInterrupt:
+        pass
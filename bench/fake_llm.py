@@ -0,0 +1,105 @@
+"""A stand-in for the OpenAI chat completions endpoint.
+
+Streams a fixed reply token by token with a configurable delay, so the bot's
+supportive chat can be load-tested without a key or network:
+
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 python bot.py
+"""
+import asyncio
+import json
+import time
+from typing import Optional
+
+REPLY = "Try breathing slowly for two minutes, then notice what changed."
+
+
+class FakeLLM:
+    def __init__(self, reply: str = REPLY, token_delay: float = 0.02, first_token_delay: float = 0.2):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.calls = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conns: set = set()
+
+    @property
+    def tokens(self):
+        words = self.reply.split(" ")
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._conns):
+                task.cancel()
+            await asyncio.gather(*self._conns, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._conns.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, v = h.decode().split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+                body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))) or b"{}")
+                self.calls += 1
+                # word counts stand in for tokens
+                usage = self._usage(sum(len(str(m.get("content", "")).split()) for m in body.get("messages", [])))
+                if body.get("stream"):
+                    if not (body.get("stream_options") or {}).get("include_usage"):
+                        usage = None
+                    await self._stream(writer, body.get("model", "stub"), usage)
+                else:
+                    await self._complete(writer, body.get("model", "stub"), usage)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._conns.discard(asyncio.current_task())
+            writer.close()
+
+    async def _complete(self, writer: asyncio.StreamWriter, model: str, usage: dict):
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(self.tokens))
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply}, "finish_reason": "stop"}],
+            "usage": usage,
+        }).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(payload), payload))
+        await writer.drain()
+
+    def _usage(self, prompt_tokens: int) -> dict:
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(self.tokens),
+                "total_tokens": prompt_tokens + len(self.tokens)}
+
+    async def _stream(self, writer: asyncio.StreamWriter, model: str, usage: Optional[dict]):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        await asyncio.sleep(self.first_token_delay)
+        for i, token in enumerate(self.tokens + [None]):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token} if token else {},
+                                  "finish_reason": None if token else "stop"}]}
+            self._chunk(writer, b"data: %s\n\n" % json.dumps(chunk).encode())
+            await writer.drain()
+            if token and i:
+                await asyncio.sleep(self.token_delay)
+        if usage:
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [], "usage": usage}
+            self._chunk(writer, b"data: %s\n\n" % json.dumps(chunk).encode())
+        self._chunk(writer, b"data: [DONE]\n\n")
+        self._chunk(writer, b"")
+        await writer.drain()
+
+    @staticmethod
+    def _chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
@@ -0,0 +1,241 @@
+"""Load test: virtual users walk the bot's flows against the fake Bot API and a stub LLM.
+
+    python bench/load_bench.py --users 500 --journeys 3
+    python bench/load_bench.py --mode webhook --workers 4 --users 2000
+    python bench/load_bench.py --save bench/baseline.json
+    python bench/load_bench.py --compare bench/baseline.json
+
+bot.py runs as a subprocess with a fresh database, exactly as deployed (RUN_MODE,
+WORKERS, ...). Each user sends /start, then a few weighted-random journeys through
+/daily, /ground, /plan, /triggers, /report and free-text chat, waiting for the bot's
+reply before the next message. Latency is from delivering an update to the bot's
+first sendMessage/editMessageText for it ("chat.done" waits for the full streamed
+reply), reported as p50/p95/p99 per step.
+
+--compare exits non-zero when throughput drops or any step's p95 grows by more than
+--tolerance (and at least --floor ms), or a step fails more often than in the baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+BOT = os.path.join(os.path.dirname(__file__), "..", "bot.py")
+CHAT = -1  # wait for the streamed reply instead of a fixed number of messages
+
+CHAT_TEXTS = [
+    "I feel tense before meetings",
+    "how do I calm down quickly",
+    "my thoughts keep racing at night",
+    "I had a rough day at work",
+    "I keep worrying about my family",
+]
+
+# (step name, text to send, replies to wait for)
+JOURNEYS = {
+    "daily": [("daily.start", "/daily", 1), ("daily.stress", "6", 1), ("daily.triggers", "noise, deadline at work", 1),
+              ("daily.sleep", "6.5", 1), ("daily.goal", "short walk after lunch", 1)],
+    "ground": [("ground.start", "/ground", 1)] + [("ground.step", "ok", 1)] * 6,
+    "plan": [("plan.start", "/plan", 1), ("plan.item", "drink water", 1), ("plan.item", "call a friend", 1),
+             ("plan.done", "done", 1)],
+    "triggers": [("triggers.start", "/triggers", 1), ("triggers.log", "crowded metro", 1),
+                 ("triggers.log", "air raid alert at night", 1), ("triggers.done", "done", 1)],
+    "report": [("report.ask", "/report", 1), ("report.value", "30", 1)],
+    "chat": [("chat", None, CHAT)],
+}
+WEIGHTS = {"daily": 4, "ground": 1, "plan": 1, "triggers": 2, "report": 2, "chat": 3}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class Run:
+    def __init__(self, api: FakeBotAPI, llm: FakeLLM, timeout: float, think: float):
+        self.api = api
+        self.llm = llm
+        self.timeout = timeout
+        self.think = think
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.updates = 0
+
+    async def step(self, uid: int, name: str, text: str, replies: int) -> bool:
+        t0 = time.perf_counter()
+        self.updates += 1
+        try:
+            await self.api.send_text(uid, text)
+            first = await self.api.next_reply(uid, self.timeout)
+            self.latency[name].append(first["at"] - t0)
+            if replies == CHAT:
+                last = first
+                while last["text"] != self.llm.reply:
+                    last = await self.api.next_reply(uid, self.timeout)
+                self.latency["chat.done"].append(last["at"] - t0)
+            else:
+                for _ in range(replies - 1):
+                    await self.api.next_reply(uid, self.timeout)
+        except asyncio.TimeoutError:
+            self.errors[name] += 1
+            return False
+        return True
+
+    async def user(self, uid: int, journeys: int, rng: random.Random):
+        if not await self.step(uid, "start", "/start", 2):
+            return
+        names = list(WEIGHTS)
+        for name in rng.choices(names, weights=[WEIGHTS[n] for n in names], k=journeys):
+            for step, text, replies in JOURNEYS[name]:
+                if self.think:
+                    await asyncio.sleep(rng.uniform(0, self.think))
+                if text is None:
+                    # half the questions repeat across users (LLM cache), half are unique
+                    text = rng.choice(CHAT_TEXTS) + ("" if rng.random() < 0.5 else f" ({uid}-{rng.random():.6f})")
+                if not await self.step(uid, step, text, replies):
+                    # the conversation state is unknown now: this user stops
+                    return
+
+    def summary(self, wall: float) -> dict:
+        steps = {}
+        for name in sorted(set(self.latency) | set(self.errors)):
+            lat = self.latency[name]
+            steps[name] = {"n": len(lat), "errors": self.errors[name],
+                           "p50": percentile(lat, 0.50) * 1000, "p95": percentile(lat, 0.95) * 1000,
+                           "p99": percentile(lat, 0.99) * 1000, "max": max(lat, default=0.0) * 1000}
+        return {"wall_s": wall, "updates": self.updates, "throughput": self.updates / wall if wall else 0.0,
+                "llm_calls": self.llm.calls, "steps": steps}
+
+
+async def wait_ready(api: FakeBotAPI, mode: str, proc: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"bot exited with {proc.returncode}")
+        if api.webhook_set.is_set() if mode == "webhook" else api.calls["getUpdates"]:
+            return
+        await asyncio.sleep(0.1)
+    raise RuntimeError("bot did not come up")
+
+
+async def bench(args) -> dict:
+    api, llm = FakeBotAPI(), FakeLLM(token_delay=args.llm_token_ms / 1000, first_token_delay=args.llm_first_ms / 1000)
+    api_port, llm_port = await api.start(), await llm.start()
+    tmp = tempfile.mkdtemp(prefix="svitlo-bench-")
+    bot_port = free_port()
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN="123:bench", TELEGRAM_API_URL=f"http://127.0.0.1:{api_port}",
+               DB_PATH=os.path.join(tmp, "bench.sqlite3"), OPENAI_API_KEY="stub",
+               OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1", RUN_MODE=args.mode, WORKERS=str(args.workers),
+               WEBHOOK_URL=f"http://127.0.0.1:{bot_port}/telegram", WEBHOOK_LISTEN="127.0.0.1", PORT=str(bot_port))
+    log_path = os.path.join(tmp, "bot.log")
+    with open(log_path, "w") as bot_log:
+        proc = subprocess.Popen([sys.executable, BOT], env=env, stdout=bot_log, stderr=subprocess.STDOUT)
+    try:
+        await wait_ready(api, args.mode, proc)
+        run = Run(api, llm, args.timeout, args.think_ms / 1000)
+
+        async def ramped(uid: int):
+            await asyncio.sleep(args.ramp * uid / args.users)
+            await run.user(uid, args.journeys, random.Random(args.seed * 1_000_003 + uid))
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(ramped(uid) for uid in range(1, args.users + 1)))
+        result = run.summary(time.perf_counter() - t0)
+    finally:
+        proc.send_signal(2)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, proc.wait, 30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        await api.close()
+        await llm.close()
+    result["config"] = {k: getattr(args, k) for k in
+                        ("users", "journeys", "mode", "workers", "think_ms", "ramp", "seed", "llm_first_ms",
+                         "llm_token_ms")}
+    result["bot_log"] = log_path
+    return result
+
+
+def report(result: dict):
+    print(f"{result['updates']} updates in {result['wall_s']:.1f}s: {result['throughput']:.0f} updates/s, "
+          f"{result['llm_calls']} LLM calls")
+    print(f"{'step':<16}{'n':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, s in result["steps"].items():
+        print(f"{name:<16}{s['n']:>7}{s['errors']:>5}{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}{s['max']:>9.1f}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float, floor: float) -> List[str]:
+    if baseline.get("config") != result["config"]:
+        print(f"note: baseline config differs: {baseline.get('config')}")
+    problems = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        problems.append(f"throughput {baseline['throughput']:.0f} -> {result['throughput']:.0f} updates/s")
+    for name, old in baseline["steps"].items():
+        new = result["steps"].get(name)
+        if new is None:
+            continue
+        delta = new["p95"] - old["p95"]
+        print(f"{name:<16} p95 {old['p95']:>8.1f} -> {new['p95']:>8.1f} ms ({delta:+.1f})")
+        if delta > max(floor, old["p95"] * tolerance):
+            problems.append(f"{name} p95 {old['p95']:.1f} -> {new['p95']:.1f} ms")
+        if new["errors"] > old["errors"]:
+            problems.append(f"{name} errors {old['errors']} -> {new['errors']}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--journeys", type=int, default=3, help="journeys per user after /start")
+    ap.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    ap.add_argument("--workers", type=int, default=1, help="bot processes (webhook mode)")
+    ap.add_argument("--think-ms", type=float, default=0, help="max random pause before each message")
+    ap.add_argument("--ramp", type=float, default=2.0, help="seconds over which users start")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--llm-first-ms", type=float, default=200)
+    ap.add_argument("--llm-token-ms", type=float, default=20)
+    ap.add_argument("--timeout", type=float, default=30, help="seconds to wait for a reply")
+    ap.add_argument("--save", metavar="PATH", help="write results as a baseline")
+    ap.add_argument("--compare", metavar="PATH", help="check results against a baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--floor", type=float, default=5.0, help="ignore p95 growth below this many ms")
+    args = ap.parse_args()
+
+    result = asyncio.run(bench(args))
+    report(result)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({k: v for k, v in result.items() if k != "bot_log"}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    failed = any(s["errors"] for s in result["steps"].values())
+    if failed:
+        print(f"some steps timed out; bot log: {result['bot_log']}")
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(result, json.load(f), args.tolerance, args.floor)
+        for p in problems:
+            print("REGRESSION:", p)
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
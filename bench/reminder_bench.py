@@ -0,0 +1,129 @@
+"""Reminder delivery under Telegram-like flood control, across a restart.
+
+    python bench/reminder_bench.py --users 2000 --rate 40 --api-limit 30
+
+Seeds a fresh database with N users whose daily reminder is due now (some with
+plan items, some who have blocked the bot), runs bot.py against the fake Bot API
+answering 429 above --api-limit messages/s, restarts it half-way through and
+checks that every user got exactly one reminder and the next one is scheduled.
+Exits non-zero on a lost or duplicated reminder.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_bot_api import FakeBotAPI  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+BOT = os.path.join(ROOT, "bot.py")
+
+
+def seed(db_path: str, users: int, blocked: set, rng: random.Random):
+    # bot.py creates the schema; its storage is only opened for the migrations
+    subprocess.run([sys.executable, "-c", "import asyncio, bot; asyncio.run(bot._migrate_only())"],
+                   cwd=ROOT, env=dict(os.environ, DB_PATH=db_path), check=True)
+    now = int(time.time())
+    minute = now % 86400 // 60
+    with sqlite3.connect(db_path) as db:
+        db.executemany(
+            "INSERT INTO users (user_id, lang, country, created_at, tz, remind_minute, next_remind_at) "
+            "VALUES (?,?,?,?,?,?,?)",
+            [(uid, rng.choice(("en", "uk")), "UA", now - 86400, "UTC", minute, now - rng.randint(0, 60))
+             for uid in range(1, users + 1)])
+        db.executemany("INSERT INTO plans (user_id, ts, item) VALUES (?,?,?)",
+                       [(uid, now - 3600, "walk outside") for uid in range(1, users + 1, 3)])
+    return now
+
+
+def start_bot(env: dict, log_path: str) -> subprocess.Popen:
+    with open(log_path, "a") as log:
+        return subprocess.Popen([sys.executable, BOT], env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def stop_bot(proc: subprocess.Popen):
+    proc.send_signal(2)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, proc.wait, 30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    tmp = tempfile.mkdtemp(prefix="svitlo-reminders-")
+    db_path, log_path = os.path.join(tmp, "bench.sqlite3"), os.path.join(tmp, "bot.log")
+    blocked = set(rng.sample(range(1, args.users + 1), args.users // 100))
+    seeded_at = seed(db_path, args.users, blocked, rng)
+
+    api = FakeBotAPI(rate_limit=args.api_limit)
+    api.blocked = blocked
+    port = await api.start()
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN="123:bench", TELEGRAM_API_URL=f"http://127.0.0.1:{port}",
+               DB_PATH=db_path, RUN_MODE="polling", REMINDER_RATE=str(args.rate), REMINDER_TICK="1")
+    expected = args.users - len(blocked)
+    delivered = lambda: sum(api.replies[uid].qsize() for uid in range(1, args.users + 1))
+
+    t0 = time.perf_counter()
+    proc = start_bot(env, log_path)
+    restarted = False
+    last, stalled_since = -1, time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(0.2)
+            n = delivered()
+            if n != last:
+                last, stalled_since = n, time.monotonic()
+            if n >= expected or time.monotonic() - stalled_since > args.stall:
+                break
+            if not restarted and n >= expected // 2:
+                print(f"restarting after {n} reminders", flush=True)
+                await stop_bot(proc)
+                proc = start_bot(env, log_path)
+                restarted = True
+        # anything still in flight would show up as a duplicate
+        await asyncio.sleep(2)
+        wall = time.perf_counter() - t0
+    finally:
+        await stop_bot(proc)
+        await api.close()
+
+    counts = {uid: api.replies[uid].qsize() for uid in range(1, args.users + 1)}
+    missing = [uid for uid, n in counts.items() if n == 0 and uid not in blocked]
+    dupes = [uid for uid, n in counts.items() if n > 1]
+    with sqlite3.connect(db_path) as db:
+        outbox = db.execute("SELECT COUNT(*) FROM reminder_outbox").fetchone()[0]
+        unscheduled = db.execute("SELECT COUNT(*) FROM users WHERE remind_minute IS NOT NULL "
+                                 "AND (next_remind_at IS NULL OR next_remind_at<=?)", (seeded_at,)).fetchone()[0]
+        still_on = db.execute(f"SELECT COUNT(*) FROM users WHERE remind_minute IS NOT NULL "
+                              f"AND user_id IN ({','.join(map(str, blocked)) or 'NULL'})").fetchone()[0]
+    sent = sum(counts.values())
+    print(f"{sent}/{expected} reminders in {wall:.1f}s ({sent / wall:.1f}/s), {api.throttled} answered 429, "
+          f"restarted: {restarted}")
+    print(f"missing {len(missing)}, duplicated {len(dupes)}, left in outbox {outbox}, "
+          f"not rescheduled {unscheduled}, blocked users still scheduled {still_on}")
+    ok = not (missing or dupes or outbox or unscheduled or still_on)
+    if not ok:
+        print(f"FAILED; bot log: {log_path}")
+    return 0 if ok else 1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--rate", type=float, default=40, help="REMINDER_RATE for the bot")
+    ap.add_argument("--api-limit", type=float, default=30, help="fake API flood limit, messages/s")
+    ap.add_argument("--stall", type=float, default=30, help="give up after this long without progress")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Storage conformance: the bot's own helpers against every backend, with the same expectations.
+
+    python bench/storage_check.py --pg postgresql://localhost/svitlo_test
+    python bench/storage_check.py --sqlite-only
+
+--pg defaults to PG_CHECK_URL, then to a postgres DATABASE_URL. Without any of them
+the script refuses to run unless --sqlite-only says a SQLite-only pass is enough.
+
+Each backend starts empty: SQLite in a temp file, Postgres in a `svitlo_check`
+schema that is dropped and recreated (nothing outside it is touched). The checks
+drive get_user, save_*, aggregate_report, top_triggers, activity_stats, the
+persistence, the LLM reply cache, reminders, a write job racing another process's
+write, and /export, then compare the export across backends and copy the data
+SQLite -> Postgres -> SQLite with copy_db, expecting every table to come back
+unchanged. Exits non-zero on any failure.
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time
+import traceback
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bot  # noqa: E402
+import storage  # noqa: E402
+
+# Telegram user ids go past 32 bits
+BIG = 7_100_000_000
+
+
+def approx(a, b) -> bool:
+    return a is not None and math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+class Check:
+    def __init__(self, name: str):
+        self.name = name
+        self.failures = []
+
+    def expect(self, ok: bool, what: str):
+        if not ok:
+            self.failures.append(what)
+
+
+async def check_users(c: Check):
+    u = await bot.get_user(None, BIG)
+    c.expect(u == {"user_id": BIG, "lang": bot.DEFAULT_LANG, "country": bot.DEFAULT_COUNTRY}, f"new user {u}")
+    await bot.get_user(None, BIG)
+    await bot.set_user_lang(BIG, "uk")
+    await bot.set_user_country(BIG, "UA")
+    bot.profiles = bot.TTLCache(100, 60)
+    u = await bot.get_user(None, BIG)
+    c.expect((u["lang"], u["country"]) == ("uk", "UA"), f"profile after update {u}")
+    row = await bot.storage.fetchone("SELECT value FROM counters WHERE name='new_users'")
+    c.expect(row == (1,), f"new_users counter {row}")
+
+
+async def check_events(c: Check):
+    uid = BIG + 1
+    await bot.get_user(None, uid)
+    await bot.save_checkin(uid, 6, "loud noise at work", 7.5, "walk")
+    await bot.save_checkin(uid, 3, "noise again", None, "")
+    await bot.save_checkin(uid, None, "", 6.0, "call a friend")
+    await bot.save_trigger(uid, "crowded metro, noise")
+    await bot.save_plan_item(uid, "drink water")
+    agg = await bot.aggregate_report(uid, 7)
+    c.expect(agg is not None and agg["n"] == 3, f"report count {agg}")
+    if agg:
+        c.expect(approx(agg["avg_stress"], 4.5), f"avg stress {agg['avg_stress']}")
+        c.expect(approx(agg["avg_sleep"], 6.75), f"avg sleep {agg['avg_sleep']}")
+        c.expect(agg["top_triggers"].split(", ")[0] == "noise", f"top trigger {agg['top_triggers']}")
+    top = await bot.top_triggers(uid, 0)
+    c.expect(top[0] == ("noise", 3), f"top_triggers {top}")
+    c.expect(await bot.aggregate_report(BIG + 99, 7) is None, "report without data")
+
+
+async def check_concurrent_writes(c: Check):
+    users, each = 20, 10
+    await asyncio.gather(*(bot.get_user(None, BIG + 100 + i) for i in range(users)))
+    await asyncio.gather(*(bot.save_checkin(BIG + 100 + i, 5, "deadline", 7, "")
+                           for i in range(users) for _ in range(each)))
+    n, stress_sum = await bot.storage.fetchone(
+        "SELECT SUM(checkins), SUM(stress_sum) FROM daily_rollups WHERE user_id>=?", (BIG + 100,))
+    c.expect(n == users * each and approx(stress_sum, 5.0 * users * each), f"rollups {n}, {stress_sum}")
+    rows = await bot.storage.fetchall("SELECT user_id, COUNT(*) FROM checkins WHERE user_id>=? GROUP BY user_id",
+                                      (BIG + 100,))
+    c.expect(sorted(n for _, n in rows) == [each] * users, f"per-user check-ins {rows}")
+
+
+async def check_activity(c: Check):
+    now = int(time.time())
+    today = now // 86400
+    old = BIG + 2
+
+    # a user who signed up 7 days ago and comes back today
+    async def job(db):
+        await db.execute("INSERT INTO users (user_id, lang, country, created_at) VALUES (?,?,?,?)",
+                         (old, "en", "US", now - 7 * 86400))
+        await bot.count_event(db, "new_users", now - 7 * 86400)
+        await bot.mark_active(db, old, today - 7)
+    await bot.storage.write(job)
+    for _ in range(2):
+        await bot.storage.write(lambda db: bot.mark_active(db, old, today))
+        await bot.storage.write(lambda db: bot.mark_active(db, BIG, today))
+    a = await bot.activity_stats(30)
+    c.expect(a["dau"] == 2, f"dau {a['dau']}")
+    # the old user was also active 7 days ago, just outside the week
+    c.expect((a["wau"], a["mau"], a["window"]["active"]) == (2, 2, 2),
+             f"wau/mau/window {a['wau']}/{a['mau']}/{a['window']['active']}")
+    for n in (7, 30):
+        distinct = await bot.storage.fetchone("SELECT COUNT(DISTINCT user_id) FROM user_days WHERE day>=?",
+                                              (today - n + 1,))
+        summed = await bot.storage.fetchone("SELECT SUM(last_active_users) FROM daily_counts WHERE day>=?",
+                                            (today - n + 1,))
+        c.expect(distinct == summed, f"{n}-day actives: {distinct} distinct, {summed} from counts")
+    c.expect(a["users"] == 3 + 20, f"users {a['users']}")
+    c.expect(a["checkins"] == 3 + 200 and a["triggers"] == 1 and a["plans"] == 1,
+             f"totals {a['checkins']}/{a['triggers']}/{a['plans']}")
+    share, size = a["retention"][7]
+    c.expect(size == 1 and share == 1.0, f"D7 retention {a['retention'][7]}")
+
+
+async def check_persistence(c: Check):
+    p = bot.DbPersistence()
+    await p.update_user_data(BIG, {"plan": ["walk"], "n": 1})
+    await p.update_conversation("daily", (BIG, BIG), 2)
+    await p.update_conversation("daily", (BIG, BIG), 3)
+    await p.update_conversation("plan", (BIG, BIG), 0)
+    await p.update_conversation("plan", (BIG, BIG), None)
+    fresh = bot.DbPersistence()
+    data = {}
+    await fresh.refresh_user_data(BIG, data)
+    c.expect(data == {"plan": ["walk"], "n": 1}, f"user_data {data}")
+    convs = await fresh.get_conversations("daily"), await fresh.get_conversations("plan")
+    c.expect(convs == ({(BIG, BIG): 3}, {}), f"conversations {convs}")
+    # an idle user leaves memory but keeps the stored copy, and is loaded again on return
+    idle = fresh.idle_users(0)
+    c.expect(idle == [BIG], f"idle users {idle}")
+    await fresh.drop_user_data(BIG)
+    data = {}
+    await fresh.refresh_user_data(BIG, data)
+    c.expect(data == {"plan": ["walk"], "n": 1}, f"user_data after eviction {data}")
+    c.expect(fresh.idle_users(3600) == [], "recently seen user is not idle")
+
+    # evicted through PTB, then back before the next flush: that flush must still write their data
+    p = bot.DbPersistence()
+    app = bot.ApplicationBuilder().token("1:check").persistence(p).build()
+    uid = BIG + 5
+    for key in ("a", "b"):
+        data = app.user_data[uid]
+        await p.refresh_user_data(uid, data)
+        data[key] = 1
+        app.mark_data_for_update_persistence(user_ids=uid)
+        await app.update_persistence()
+        for idle in p.idle_users(0):
+            app.drop_user_data(idle)
+    await app.update_persistence()
+    row = await bot.storage.fetchone("SELECT data FROM user_state WHERE user_id=?", (uid,))
+    c.expect(row == ('{"a": 1, "b": 1}',), f"user_data written across an eviction {row}")
+    c.expect(uid not in app.user_data, "evicted user_data left in memory")
+
+
+async def check_llm_cache(c: Check):
+    bot.LLM_CACHE_DISK = True
+    try:
+        await bot.store_reply("k1", "first")
+        await bot.store_reply("k1", "second")
+        bot.llm_cache = bot.TTLCache(100, 60)
+        c.expect(await bot.cached_reply("k1") == "second", "disk cache hit")
+        c.expect(await bot.cached_reply("k2") is None, "disk cache miss")
+    finally:
+        bot.LLM_CACHE_DISK = False
+
+
+async def check_reminders(c: Check):
+    uid = BIG + 1
+    await bot.set_reminder(uid, 20 * 60 + 30, "Europe/Kyiv")
+    c.expect(await bot.get_reminder(uid, "UA") == (1230, "Europe/Kyiv"), "get_reminder")
+    now = int(time.time())
+    await bot.storage.execute("UPDATE users SET next_remind_at=? WHERE user_id=?", (now - 5, uid))
+    claimed = await bot.claim_due_reminders(now), await bot.claim_due_reminders(now)
+    c.expect(claimed == (1, 0), f"claimed {claimed}")
+    rows = await bot.storage.fetchall(bot.OUTBOX_SELECT.format(plans=bot.storage.join_lines.format("'• ' || item")),
+                                      (now, 1, 0, 10))
+    c.expect([r[:2] for r in rows] == [(uid, now - 5)] and rows[0][4] == "• drink water", f"outbox {rows}")
+    nxt = await bot.storage.fetchone("SELECT next_remind_at FROM users WHERE user_id=?", (uid,))
+    c.expect(nxt[0] > now, f"next reminder {nxt}")
+    await bot.set_reminder(uid, None, "Europe/Kyiv")
+    left = await bot.storage.fetchone("SELECT COUNT(*) FROM reminder_outbox")
+    c.expect(left == (0,), f"outbox after /remind off {left}")
+
+
+async def check_read_then_write(c: Check, url: str):
+    """A write job that reads before it writes (like claim_due_reminders) while another
+    process writes to the same database in between: the job, and the rest of its batch,
+    must still commit."""
+    uid, other_uid, now = BIG + 3, BIG + 4, int(time.time())
+    await bot.get_user(None, uid)
+    await bot.get_user(None, other_uid)
+    other = bot.open_storage(url, bot.SCHEMA)
+    await other.open()
+    read = asyncio.Event()
+    sql = "INSERT INTO triggers (user_id, ts, note) VALUES (?,?,?)"
+
+    async def job(db):
+        n = (await db.fetchone("SELECT COUNT(*) FROM triggers WHERE user_id=?", (uid,)))[0]
+        read.set()
+        await asyncio.sleep(0.2)
+        await db.execute(sql, (uid, now, f"after {n}"))
+
+    async def foreign():
+        await read.wait()
+        await other.execute(sql, (uid, now, "other process"))
+
+    try:
+        results = await asyncio.gather(bot.storage.write(job), bot.storage.execute(sql, (other_uid, now, "same batch")),
+                                       foreign(), return_exceptions=True)
+    finally:
+        await other.close()
+    c.expect(all(r is None for r in results), f"writes {results}")
+    rows = await bot.storage.fetchall("SELECT user_id, note FROM triggers WHERE user_id IN (?,?) ORDER BY note",
+                                      (uid, other_uid))
+    c.expect(rows == [(uid, "after 0"), (uid, "other process"), (other_uid, "same batch")], f"rows {rows}")
+
+
+async def check_export(c: Check) -> list:
+    files = await bot.build_export(BIG + 1, "UTC", bot.load_i18n("en"), False)
+    c.expect(files is not None, "export")
+    c.expect(await bot.build_export(BIG + 99, "UTC", bot.load_i18n("en"), False) is None, "empty export")
+    if files is None:
+        return []
+    with files[0] as f:
+        lines = f.read().decode("utf-8-sig").splitlines()
+    c.expect(len(lines) == 1 + 3 + 1 + 1, f"export rows {lines}")
+    # times differ between runs; the rest must match across backends
+    return [line.split(",", 2)[0] + "," + line.split(",", 2)[2] for line in lines[1:]]
+
+
+async def check_lock(c: Check, url: str):
+    other = bot.open_storage(url, bot.SCHEMA)
+    await other.open()
+    try:
+        first = await bot.storage.try_lock("svitlo:check")
+        again = await bot.storage.try_lock("svitlo:check")
+        second = await other.try_lock("svitlo:check")
+        expected = (True, True, bot.storage.dialect == "sqlite")
+        c.expect((first, again, second) == expected, f"try_lock {(first, again, second)}, expected {expected}")
+    finally:
+        await other.close()
+
+
+CHECKS = (check_users, check_events, check_concurrent_writes, check_activity, check_persistence,
+          check_llm_cache, check_reminders)
+
+
+async def run_backend(name: str, url: str) -> tuple:
+    bot.storage = bot.open_storage(url, bot.SCHEMA)
+    bot.profiles = bot.TTLCache(100, 60)
+    bot.llm_cache = bot.TTLCache(100, 60)
+    await bot.init_db()
+    results, export = [], []
+    try:
+        for check in CHECKS + (check_read_then_write, check_export, check_lock):
+            c = Check(check.__name__)
+            t0 = time.perf_counter()
+            try:
+                out = await (check(c, url) if check in (check_read_then_write, check_lock) else check(c))
+                if check is check_export:
+                    export = out
+            except Exception:
+                c.failures.append(traceback.format_exc())
+            results.append(c)
+            print(f"  {name:<9}{c.name:<26}{'ok' if not c.failures else 'FAILED':<8}"
+                  f"{(time.perf_counter() - t0) * 1000:>8.1f} ms")
+            for f in c.failures:
+                print("      " + f.replace("\n", "\n      "))
+    finally:
+        await bot.close_db()
+    return results, export
+
+
+async def dump(url: str) -> dict:
+    s = bot.open_storage(url, bot.SCHEMA)
+    await s.open()
+    try:
+        return {t: sorted(await s.fetchall(f"SELECT {cols} FROM {t}"), key=repr) for t, cols in bot.COPY_TABLES}
+    finally:
+        await s.close()
+
+
+async def fresh_schema(url: str, schema: str) -> str:
+    """A URL whose connections use an empty `schema` (asyncpg passes unknown query params as settings)."""
+    conn = await storage.asyncpg.connect(url)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}")
+    finally:
+        await conn.close()
+    parts = urlsplit(url)
+    query = "&".join(q for q in (parts.query, urlencode({"search_path": schema})) if q)
+    return urlunsplit(parts._replace(query=query))
+
+
+async def main_async(args) -> int:
+    tmp = tempfile.mkdtemp(prefix="svitlo-check-")
+    backends = [("sqlite", os.path.join(tmp, "check.sqlite3"))]
+    if args.pg:
+        backends.append(("postgres", await fresh_schema(args.pg, "svitlo_check")))
+    failed, exports = 0, {}
+    for name, url in backends:
+        results, exports[name] = await run_backend(name, url)
+        failed += sum(bool(c.failures) for c in results)
+    if args.pg:
+        c = Check("same export")
+        c.expect(exports["sqlite"] == exports["postgres"], f"{exports['sqlite']} != {exports['postgres']}")
+        # SQLite -> Postgres -> SQLite must give back every row unchanged
+        pg_copy = await fresh_schema(args.pg, "svitlo_check_copy")
+        back = os.path.join(tmp, "back.sqlite3")
+        t0 = time.perf_counter()
+        try:
+            await bot.copy_db(backends[0][1], pg_copy)
+            await bot.copy_db(pg_copy, back)
+            original, there, returned = await dump(backends[0][1]), await dump(pg_copy), await dump(back)
+            for table in original:
+                c.expect(original[table] == there[table] == returned[table], f"copy of {table} differs")
+            # ids keep counting after the copied rows
+            bot.storage = bot.open_storage(pg_copy, bot.SCHEMA)
+            await bot.init_db()
+            try:
+                await bot.save_plan_item(BIG + 1, "after copy")
+                top = await bot.storage.fetchone("SELECT MAX(id) FROM plans")
+                c.expect(top[0] == len(original["plans"]) + 1, f"plan id after copy {top}")
+            finally:
+                await bot.close_db()
+        except Exception:
+            c.failures.append(traceback.format_exc())
+        print(f"  {'both':<9}{'export + copy round trip':<26}{'ok' if not c.failures else 'FAILED':<8}"
+              f"{(time.perf_counter() - t0) * 1000:>8.1f} ms")
+        for f in c.failures:
+            print("      " + f.replace("\n", "\n      "))
+        failed += bool(c.failures)
+    print("all checks passed" if not failed else f"{failed} checks failed")
+    return 1 if failed else 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    database_url = os.getenv("DATABASE_URL", "")
+    ap.add_argument("--pg", metavar="URL",
+                    default=os.getenv("PG_CHECK_URL") or (database_url if database_url.startswith("postgres") else None),
+                    help="also check Postgres at this URL (uses its own schemas there)")
+    ap.add_argument("--sqlite-only", action="store_true", help="skip Postgres on purpose")
+    args = ap.parse_args()
+    if args.sqlite_only:
+        args.pg = None
+    elif not args.pg:
+        sys.exit("no Postgres to check: pass --pg URL (or set PG_CHECK_URL / DATABASE_URL), "
+                 "or --sqlite-only to check SQLite alone")
+    if args.pg and storage.asyncpg is None:
+        sys.exit("--pg needs asyncpg installed")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Crisis phrase detection: one Aho-Corasick pass over a normalized message.
+
+Phrase lists live in i18n/crisis/<lang>.txt (one phrase per line, `#` comments).
+A trailing `*` makes the last word a stem, so `суїцид*` also matches `суїцидальні`;
+otherwise phrases only match whole words.
+
+Text and phrases go through the same folding, so matching is insensitive to
+case, diacritics (ї/і, й/и), apostrophe variants, Latin/Cyrillic lookalikes
+and punctuation or extra spaces between words.
+"""
+import os
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+PHRASES_DIR = os.getenv("CRISIS_PHRASES_DIR") or os.path.join(os.path.dirname(__file__), "i18n", "crisis")
+
+# Cyrillic letters that look like Latin ones are mapped to the Latin letter
+# (on both sides), so "kіll" with a Cyrillic і or "сyїцид" with a Latin y still match.
+HOMOGLYPHS = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j", "ѕ": "s", "ԁ": "d",
+    "ґ": "г", "ё": "e",
+    "0": "o", "@": "a", "$": "s",
+})
+APOSTROPHES = "'’ʼ‘`´′＇"
+_drop_apostrophes = str.maketrans("", "", APOSTROPHES)
+_words = re.compile(r"[^\W_]+")
+
+
+def fold(text: str) -> str:
+    """Canonical form used for matching: ` word word ... ` with single spaces and padding."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.casefold().translate(_drop_apostrophes).translate(HOMOGLYPHS)
+    return " " + " ".join(_words.findall(text)) + " "
+
+
+class CrisisMatcher:
+    """Multi-pattern matcher; `search` is linear in message length regardless of phrase count."""
+
+    def __init__(self, phrases: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[str]] = [None]
+        self.phrases: List[str] = []
+        for phrase in phrases:
+            self._add(phrase)
+        self._link()
+
+    def _add(self, phrase: str):
+        phrase = phrase.strip()
+        stem = phrase.endswith("*")
+        key = fold(phrase.rstrip("*"))
+        if not key.strip():
+            return
+        if stem:
+            key = key[:-1]
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        self._out[node] = phrase
+        self.phrases.append(phrase)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                if self._out[nxt] is None:
+                    # a node reports the longest phrase ending here, or one reachable by fail links
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Optional[str]:
+        """Return the first phrase found in `text`, or None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in fold(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+
+def load_phrases(folder: str = PHRASES_DIR) -> List[str]:
+    phrases = []
+    if os.path.isdir(folder):
+        for fn in sorted(os.listdir(folder)):
+            if fn.endswith(".txt"):
+                with open(os.path.join(folder, fn), "r", encoding="utf-8") as f:
+                    phrases.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return phrases
+
+
+def load_matcher(folder: str = PHRASES_DIR) -> CrisisMatcher:
+    return CrisisMatcher(load_phrases(folder))